@@ -3,7 +3,8 @@ Utility script to render every FastAPI page into plain HTML files so the site
 can be hosted statically (e.g. on GitHub Pages).
 
 Usage:
-    python build_static.py
+    python build_static.py          # only re-render pages whose sources changed
+    python build_static.py --force  # re-render everything from scratch
 
 Output:
     ./static_site/
@@ -11,145 +12,514 @@ Output:
         Basics/Overview/index.html
         ...
         static/ (copied assets)
+        .manifest.json (per-page fingerprints for incremental builds)
 """
 
 from __future__ import annotations
 
+import argparse
+import asyncio
+import hashlib
+import json
+import os
 import re
 import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import AsyncExitStack
+from datetime import datetime
+from functools import lru_cache, partial
+from multiprocessing.util import Finalize
 from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from urllib.parse import quote
 
-from fastapi.testclient import TestClient
-
-from main import app, list_pages, BASE_DIR, STATIC_DIR  # type: ignore
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+from main import (  # type: ignore
+    app,
+    list_pages,
+    page_has_valid_boards,
+    BASE_DIR,
+    CONTENT_ROOT,
+    STATIC_DIR,
+    TEMPLATES_DIR,
+)
 
 OUTPUT_DIR = BASE_DIR / "static_site"
+MANIFEST_FILE = OUTPUT_DIR / ".manifest.json"
 # Set this to the public prefix you will host from, e.g.
 # "https://username.github.io/repo/static_site"
 # Leave empty to use relative links (good for local file:// testing).
 PUBLIC_BASE = r"github.com/WilliamChristopherAlt/TetrisGuide/static_site"
 
-
-def rewrite_paths(html: str, page_path: str, base_url: str) -> str:
-    """Rewrite asset and internal links so they work in a static context."""
-    static_prefix = compute_static_prefix(page_path, base_url)
-    root_prefix = compute_root_prefix(page_path, base_url)
-
-    replacements = [
-        ('href="/static/', f'href="{static_prefix}/'),
-        ("href='/static/", f"href='{static_prefix}/"),
-        ('src="/static/', f'src="{static_prefix}/'),
-        ("src='/static/", f"src='{static_prefix}/"),
-        ('href="http://testserver/static/', f'href="{static_prefix}/'),
-        ("href='http://testserver/static/", f"href='{static_prefix}/"),
-        ('src="http://testserver/static/', f'src="{static_prefix}/'),
-        ("src='http://testserver/static/", f"src='{static_prefix}/"),
-    ]
-    for old, new in replacements:
-        html = html.replace(old, new)
-
-    def convert_href(match):
-        path = match.group(1)
-        if not path or path.startswith("static/"):
-            target = f"{root_prefix}index.html"
-        else:
-            if "?" in path or "#" in path:
-                return match.group(0)
-            encoded = quote(path, safe="/:")
-            target = f"{root_prefix}{encoded}/index.html"
-        return f'href="{target}"'
-
-    def convert_href_single(match):
-        path = match.group(1)
-        if not path or path.startswith("static/"):
-            target = f"{root_prefix}index.html"
-        else:
-            if "?" in path or "#" in path:
-                return match.group(0)
-            encoded = quote(path, safe="/:")
-            target = f"{root_prefix}{encoded}/index.html"
-        return f"href='{target}'"
-
-    html = re.sub(r'href="http://testserver/([^"]*)"', convert_href, html)
-    html = re.sub(r"href='http://testserver/([^']*)'", convert_href_single, html)
-
-    html = html.replace(
-        'window.location.href = "/" + name;',
-        f'window.location.href = "{root_prefix}" + name + "/index.html";',
+# Job tuple handed to worker processes, precomputed once per page:
+# (page_path, depth, target_dir, route)
+RenderJob = Tuple[str, int, Path, str]
+
+# Link rewriter for one page depth: rendered HTML bytes in, rewritten bytes out
+Rewriter = Callable[[bytes], bytes]
+
+# Cap on in-flight requests inside one worker's batch.
+MAX_CONCURRENT_RENDERS = 64
+
+# Per-worker render state. It is created by _init_worker inside each worker
+# process rather than pickled from the parent, so the app is built once per
+# worker and its lifespan runs once, not once per batch.
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_stack: Optional[AsyncExitStack] = None
+_worker_rewriters: Dict[int, Rewriter] = {}
+
+# Buffer sizes for writing rendered pages and for the fallback asset copy.
+IO_BUFFER_SIZE = 1 << 20
+COPY_BUFFER_SIZE = 4 << 20
+
+# FICLONE ioctl request from <linux/fs.h> (reflink copy on btrfs/XFS)
+_FICLONE = 0x40049409
+
+# Threads used to copy static assets in parallel.
+COPY_WORKERS = 16
+
+# Every link the static export has to rewrite, matched in a single pass over
+# the raw response bytes (all patterns are ASCII, so no decode is needed).
+# Links are matched as whole href/src attribute values, so spacing around "="
+# and either quote style are handled the same way; _rewrite_url then decides
+# per value. The only non-attribute target is the page-jump script in
+# base.html, matched literally as `nav`.
+_LINK_RE = re.compile(
+    rb"""(?P<attr>href|src)(?P<eq>\s*=\s*)"""
+    rb"""(?:"(?P<dq>(?:/|http://testserver/)[^"]*)"|'(?P<sq>(?:/|http://testserver/)[^']*)')"""
+    rb"""|(?P<nav>window\.location\.href = "/" \+ name;)"""
+)
+
+_TESTSERVER = b"http://testserver/"
+
+# Cheap substring probes: a page containing none of these has nothing for
+# _LINK_RE to rewrite, so the regex pass can be skipped entirely.
+_LINK_MARKERS = (b"/static/", _TESTSERVER, b"window.location.href")
+
+
+@lru_cache(maxsize=4096)
+def _quote_path(path: bytes) -> bytes:
+    """Percent-encode a page path. Sidebar links repeat on every page."""
+    return quote(path, safe="/:").encode("ascii")
+
+
+def _rewrite_url(
+    attr: bytes, url: bytes, static_prefix: bytes, root_prefix: bytes
+) -> Optional[bytes]:
+    """
+    Map a root-relative or testserver URL to its static-site equivalent.
+    Returns None when the URL should be left untouched.
+    """
+    if url.startswith(b"/static/"):
+        return static_prefix + url[len(b"/static") :]
+    if not url.startswith(_TESTSERVER):
+        return None
+
+    path = url[len(_TESTSERVER) :]
+    if path.startswith(b"static/"):
+        return static_prefix + path[len(b"static") :]
+    if attr != b"href":
+        return None
+    if not path:
+        return root_prefix + b"index.html"
+    if b"?" in path or b"#" in path:
+        return None
+    return root_prefix + _quote_path(path) + b"/index.html"
+
+
+def _rewrite_link(match: re.Match, static_prefix: bytes, root_prefix: bytes) -> bytes:
+    """Compute the replacement for one _LINK_RE match."""
+    if match.group("nav") is not None:
+        return b'window.location.href = "' + root_prefix + b'" + name + "/index.html";'
+    if match.group("dq") is not None:
+        quote_char, url = b'"', match.group("dq")
+    else:
+        quote_char, url = b"'", match.group("sq")
+    attr = match.group("attr")
+    rewritten = _rewrite_url(attr, url, static_prefix, root_prefix)
+    if rewritten is None:
+        return match.group(0)
+    return attr + match.group("eq") + quote_char + rewritten + quote_char
+
+
+def _rewrite_link_cached(
+    match: re.Match,
+    static_prefix: bytes,
+    root_prefix: bytes,
+    replacements: Dict[bytes, bytes],
+) -> bytes:
+    """
+    Substitution callback for _LINK_RE. The replacement depends only on the
+    matched text once the prefixes are fixed, so it is memoized per rewriter.
+    """
+    text = match.group(0)
+    replacement = replacements.get(text)
+    if replacement is None:
+        replacement = _rewrite_link(match, static_prefix, root_prefix)
+        replacements[text] = replacement
+    return replacement
+
+
+def _rewrite_html(html: bytes, rewrite_link: Callable[[re.Match], bytes]) -> bytes:
+    """Apply _LINK_RE to a page, short-circuiting pages without any links."""
+    if not any(marker in html for marker in _LINK_MARKERS):
+        return html
+    return _LINK_RE.sub(rewrite_link, html)
+
+
+def make_rewriter(base_url: str, depth: int) -> Rewriter:
+    """
+    Specialize the link rewriter for one (base_url, depth) pair. Prefixes are
+    encoded once here and every distinct link's replacement is computed at
+    most once, so the per-page work is a single regex scan plus dict lookups.
+    The result is a plain partial, so it can be built once in the parent and
+    shipped to workers.
+    """
+    return partial(
+        _rewrite_html,
+        rewrite_link=partial(
+            _rewrite_link_cached,
+            static_prefix=compute_static_prefix(depth, base_url).encode("utf-8"),
+            root_prefix=compute_root_prefix(depth, base_url).encode("utf-8"),
+            replacements={},
+        ),
     )
 
-    return html
+
+def build_rewriters(depths: Iterable[int], base_url: str) -> Dict[int, Rewriter]:
+    """Precompute one rewriter per distinct page depth."""
+    return {depth: make_rewriter(base_url, depth) for depth in depths}
 
 
-def compute_static_prefix(page_path: str, base_url: str) -> str:
-    """Return the correct static prefix for a page path."""
+def page_depth(page_path: str) -> int:
+    """Number of folders between the site root and a page ("" is the root)."""
+    return page_path.count("/") + 1 if page_path else 0
+
+
+@lru_cache(maxsize=64)
+def compute_static_prefix(depth: int, base_url: str) -> str:
+    """Return the correct static prefix for a page `depth` folders deep."""
     if base_url:
         return f"{base_url.rstrip('/')}/static"
-    if not page_path:
-        return "static"
-    depth = len(Path(page_path).parts)
     relative = "../" * depth
     return f"{relative}static"
 
 
-def compute_root_prefix(page_path: str, base_url: str) -> str:
+@lru_cache(maxsize=64)
+def compute_root_prefix(depth: int, base_url: str) -> str:
     """Return the correct root prefix for internal links."""
     if base_url:
         return base_url.rstrip("/") + "/"
-    if not page_path:
-        return ""
-    depth = len(Path(page_path).parts)
     return "../" * depth
 
 
-def dump_route(
-    client: TestClient,
-    route: str,
-    target_dir: Path,
-    page_path: str,
-    base_url: str,
-) -> None:
-    """Request a route and write the HTML to target_dir/index.html."""
+async def _raw_render(route: str) -> Tuple[int, bytes]:
+    """
+    Call the ASGI app directly for a GET of `route` and return the status and
+    raw body bytes. Response headers are discarded; the host header makes
+    url_for() produce the http://testserver/ links _LINK_RE expects.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": route,
+        "raw_path": quote(route).encode("ascii"),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    status = 500
+    body = bytearray()
+    request_sent = False
+    response_done = asyncio.Event()
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal request_sent
+        if request_sent:
+            await response_done.wait()
+            return {"type": "http.disconnect"}
+        request_sent = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body.extend(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_done.set()
+
+    await app(scope, receive, send)
+    return status, bytes(body)
+
+
+async def dump_route(route: str, target_dir: Path, rewrite: Rewriter) -> None:
+    """Render a route and write the HTML to target_dir/index.html."""
     print(f"Rendering {route}")
-    response = client.get(route)
-    if response.status_code != 200:
-        raise RuntimeError(f"Failed to render {route}: {response.status_code}")
-
-    output_file = target_dir / "index.html"
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    html = rewrite_paths(response.text, page_path, base_url)
-    output_file.write_text(html, encoding="utf-8")
+    status, content = await _raw_render(route)
+    if status != 200:
+        raise RuntimeError(f"Failed to render {route}: {status}")
+
+    html = rewrite(content)
+    # Hand the disk write to a thread so the loop keeps rendering other pages
+    await asyncio.to_thread(_write_page, target_dir / "index.html", html)
+
+
+def _write_page(output_file: Path, html: bytes) -> None:
+    """Write one rendered page. Its folder is created up front by main()."""
+    with open(output_file, "wb", buffering=IO_BUFFER_SIZE) as f:
+        f.write(html)
+
+
+async def _render_all(jobs: List[RenderJob]) -> None:
+    """Render every job concurrently against the app, in-process over ASGI."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_RENDERS)
+
+    async def render(job: RenderJob) -> None:
+        _page_path, depth, target_dir, route = job
+        async with semaphore:
+            await dump_route(route, target_dir, _worker_rewriters[depth])
+
+    await asyncio.gather(*(render(job) for job in jobs))
+
+
+async def _start_worker_app() -> None:
+    """Run the app startup for this worker."""
+    global _worker_stack
+    stack = AsyncExitStack()
+    await stack.enter_async_context(app.router.lifespan_context(app))
+    _worker_stack = stack
+
+
+def _close_worker() -> None:
+    """Run the app shutdown and close the worker's event loop."""
+    if _worker_loop is None or _worker_stack is None:
+        return
+    _worker_loop.run_until_complete(_worker_stack.aclose())
+    _worker_loop.close()
+
+
+def _init_worker(rewriters: Dict[int, Rewriter]) -> None:
+    """Start this worker's event loop and app lifespan exactly once."""
+    global _worker_loop
+    _worker_rewriters.update(rewriters)
+    _worker_loop = asyncio.new_event_loop()
+    _worker_loop.run_until_complete(_start_worker_app())
+    # Pool workers leave through os._exit, which skips atexit handlers;
+    # multiprocessing finalizers still run there (and at normal exit).
+    Finalize(None, _close_worker, exitpriority=10)
+
+
+def _render_batch(jobs: List[RenderJob]) -> None:
+    """Worker entry point: render a batch on the worker's persistent loop."""
+    _worker_loop.run_until_complete(_render_all(jobs))
+
+
+def _fast_copy(src: str, dst: str) -> None:
+    """
+    Copy a single file, letting the kernel move the data where it can:
+    a FICLONE reflink on copy-on-write filesystems, then copy_file_range,
+    then a plain large-buffer copy.
+    """
+    with open(src, "rb") as sf, open(dst, "wb") as df:
+        if fcntl is not None and sys.platform.startswith("linux"):
+            try:
+                fcntl.ioctl(df.fileno(), _FICLONE, sf.fileno())
+                return
+            except OSError:
+                pass
+
+        if hasattr(os, "copy_file_range"):
+            remaining = os.fstat(sf.fileno()).st_size
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(sf.fileno(), df.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            except OSError:
+                # Unsupported here; the fallback resumes from the current offsets
+                pass
+
+        shutil.copyfileobj(sf, df, length=COPY_BUFFER_SIZE)
+
+
+def _collect_tree(src_dir: str, dst_dir: str, pairs: List[Tuple[str, str]]) -> None:
+    """
+    Recreate the folder structure of src_dir under dst_dir and record every
+    (source, destination) file pair to copy.
+    """
+    os.makedirs(dst_dir, exist_ok=True)
+    with os.scandir(src_dir) as entries:
+        for entry in entries:
+            target = os.path.join(dst_dir, entry.name)
+            if entry.is_dir():
+                _collect_tree(entry.path, target, pairs)
+            else:
+                pairs.append((entry.path, target))
 
 
 def copy_static_assets() -> None:
     """Copy /static files into the static build directory."""
     dest = OUTPUT_DIR / "static"
-    shutil.copytree(STATIC_DIR, dest)
-
+    pairs: List[Tuple[str, str]] = []
+    _collect_tree(str(STATIC_DIR), str(dest), pairs)
+    # Copies are syscall-bound, so threads overlap them despite the GIL
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+        list(pool.map(lambda pair: _fast_copy(*pair), pairs))
+
+
+def _template_for(route: str) -> str:
+    """Name of the Jinja template main.py renders for a route."""
+    return "index.html" if route == "/" else "page.html"
+
+
+def _stat_token(path: Path) -> str:
+    """Identify a file revision by path, mtime and size (empty if missing)."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return f"{path}:missing"
+    return f"{path}:{st.st_mtime_ns}:{st.st_size}"
+
+
+def _site_fingerprint(base_url: str, pages: List[str]) -> str:
+    """
+    Digest of everything that affects every page at once: the public base,
+    the templates and rendering code, the footer year and the sidebar
+    (i.e. which pages are currently valid).
+    """
+    digest = hashlib.sha256()
+    digest.update(base_url.encode("utf-8"))
+    digest.update(str(datetime.now().year).encode("ascii"))
+    for code_file in (BASE_DIR / "main.py", Path(__file__).resolve()):
+        digest.update(_stat_token(code_file).encode("utf-8"))
+    for template in sorted(TEMPLATES_DIR.rglob("*")):
+        digest.update(_stat_token(template).encode("utf-8"))
+    for page_path in pages:
+        if page_has_valid_boards(page_path):
+            digest.update(page_path.encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
+
+def _page_fingerprint(site_digest: str, page_path: str) -> str:
+    """Digest of a page's own sources (page.txt and its boards) plus the site."""
+    digest = hashlib.sha256(site_digest.encode("ascii"))
+    if page_path:
+        page_dir = CONTENT_ROOT / page_path
+        digest.update(_stat_token(page_dir / "page.txt").encode("utf-8"))
+        boards_dir = page_dir / "boards"
+        if boards_dir.is_dir():
+            for board in sorted(boards_dir.iterdir()):
+                digest.update(_stat_token(board).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _load_manifest() -> Dict[str, str]:
+    """Return the fingerprints recorded by the previous build, if any."""
+    try:
+        return json.loads(MANIFEST_FILE.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest: Dict[str, str]) -> None:
+    """Write the manifest atomically so an interrupted build never leaves half a file."""
+    tmp_file = MANIFEST_FILE.with_suffix(".tmp")
+    tmp_file.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_file, MANIFEST_FILE)
+
+
+def _remove_page_output(page_path: str) -> None:
+    """Delete the export of a page that no longer exists."""
+    target_dir = OUTPUT_DIR / page_path
+    (target_dir / "index.html").unlink(missing_ok=True)
+    try:
+        # Prune now-empty parent folders, stopping at the first non-empty one
+        os.removedirs(target_dir)
+    except OSError:
+        pass
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export the site as static HTML.")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="re-render every page, ignoring the previous build's manifest",
+    )
+    args = parser.parse_args(argv)
 
-def main() -> None:
     base_url = PUBLIC_BASE.rstrip("/")
+    previous = {} if args.force else _load_manifest()
 
-    if OUTPUT_DIR.exists():
+    if not previous and OUTPUT_DIR.exists():
+        # Full build: start from an empty output folder
         shutil.rmtree(OUTPUT_DIR)
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+    shutil.rmtree(OUTPUT_DIR / "static", ignore_errors=True)
     copy_static_assets()
 
-    with TestClient(app) as client:
-        # Root index
-        dump_route(client, "/", OUTPUT_DIR, "", base_url)
-
-        # Individual content pages
-        for page_path in list_pages():
-            route = f"/{page_path}"
-            target_dir = OUTPUT_DIR / Path(page_path)
-            dump_route(client, route, target_dir, page_path, base_url)
-
+    pages = list_pages()
+    site_digest = _site_fingerprint(base_url, pages)
+    manifest: Dict[str, str] = {"": _page_fingerprint(site_digest, "")}
+    for page_path in pages:
+        manifest[page_path] = _page_fingerprint(site_digest, page_path)
+
+    for page_path in previous.keys() - manifest.keys():
+        _remove_page_output(page_path)
+
+    # Root index first, then every individual content page, skipping any page
+    # whose sources are unchanged since its last export
+    jobs: List[RenderJob] = []
+    for page_path, fingerprint in manifest.items():
+        target_dir = OUTPUT_DIR / page_path
+        if previous.get(page_path) == fingerprint and (target_dir / "index.html").exists():
+            continue
+        jobs.append((page_path, page_depth(page_path), target_dir, f"/{page_path}"))
+
+    # Render pages sharing a template back to back; batches are contiguous
+    # slices, so each template group also stays on as few workers as possible
+    jobs.sort(key=lambda job: _template_for(job[3]))
+
+    if jobs:
+        # Create every output folder once here instead of once per page write
+        for target_dir in {target_dir for _, _, target_dir, _ in jobs}:
+            os.makedirs(target_dir, exist_ok=True)
+
+        rewriters = build_rewriters({depth for _, depth, _, _ in jobs}, base_url)
+
+        # One contiguous batch per worker: each worker enters the app once and
+        # gathers its whole batch, so shared work inside the app is amortized
+        workers = min(os.cpu_count() or 1, len(jobs))
+        batch_size = -(-len(jobs) // workers)
+        batches = [jobs[i : i + batch_size] for i in range(0, len(jobs), batch_size)]
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(rewriters,),
+        ) as pool:
+            list(pool.map(_render_batch, batches))
+
+    _save_manifest(manifest)
+
+    skipped = len(manifest) - len(jobs)
+    if skipped:
+        print(f"Skipped {skipped} unchanged page(s)")
     print(f"Static site exported to {OUTPUT_DIR}")
 
 
 if __name__ == "__main__":
     main()
-
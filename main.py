@@ -1,9 +1,13 @@
+import hashlib
+import os
+import re
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from datetime import datetime
+from functools import lru_cache
 
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
@@ -20,6 +24,66 @@ app = FastAPI(title="Tetris Guide Blog")
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
+# Patterns used while parsing page.txt, compiled once at import time
+_BOARD_RE = re.compile(
+    r"\[\[\s*(BOARD|BOARDS)\s*:\s*([^\]]+?)\s*\]\]",
+    flags=re.IGNORECASE,
+)
+_BOARD_PLACEHOLDER_RE = re.compile(r'@@BOARDPLACEHOLDER(\d+)@@')
+# Every line boundary str.splitlines() recognises other than a plain '\n'
+_LINE_BREAK_RE = re.compile(r'\r\n|[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+# A '---' line (kept, becomes an <hr>) or a SOURCE: line (removed with its newline)
+_RULE_OR_SOURCE_RE = re.compile(
+    r'^[^\S\n]*(?:(---)[^\S\n]*$|SOURCE:[^\S\n]*(.*?)[^\S\n]*(?:\n|\Z))',
+    flags=re.MULTILINE | re.IGNORECASE,
+)
+_HEADING_RE = re.compile(r'<div class="(h1|h2|h3)">(.*?)</div>', re.IGNORECASE)
+_HEADING_ID_STRIP = re.compile(r'[^a-z0-9\s-]')
+_HEADING_ID_SPACE = re.compile(r'\s+')
+_ARTICLE_TITLE = re.compile(r'(<div class="article-title">)(.*?)(</div>)')
+# **bold**, *bold* and _italic_ in one alternation; the list variant leaves
+# out *bold* so a leading '*' bullet is not paired up
+_INLINE_RE = re.compile(
+    r'\*\*(?P<bold>.+?)\*\*'
+    r'|(?<!\*)\*(?P<star>[^*\n]+?)\*(?!\*)'
+    r'|_(?P<em>[^_\n]+?)_'
+)
+_INLINE_LIST_RE = re.compile(r'\*\*(?P<bold>.+?)\*\*|_(?P<em>[^_\n]+?)_')
+_LIST_MARKER = re.compile(r'^\s*([-*]|\d+\.)\s')
+_LIST_BULLET = re.compile(r'^(\s*)([-*])\s+(.+)$')
+_LIST_NUMBERED = re.compile(r'^(\s*)(\d+)\.\s+(.+)$')
+
+# Board cell markup per piece letter (either case); any other character
+# renders as an empty cell
+_CELL_HTML = {
+    ch: f'<div class="tetris-cell cell-{ch.lower()}" data-piece="{ch.lower()}"></div>'
+    for ch in "iotszjlIOTSZJL"
+}
+_EMPTY_CELL = '<div class="tetris-cell cell-empty" data-piece=""></div>'
+
+# Technical folders we don't want to expose as pages
+_NON_PAGE_DIRS = {"boards", "pages", "boards_old"}
+
+# Public pages may be reused briefly, then are revalidated with their ETag
+_PAGE_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+# The editor has to show a save straight away, so it always revalidates
+_EDITOR_CACHE_CONTROL = "no-cache"
+
+# Sidebar tree and valid page list, keyed by _content_signature()
+_sidebar_cache: Dict[str, Any] = {"mtime": None, "tree": None, "pages": None}
+
+
+def _scan_page_folders(directory: str, found: List[str]) -> None:
+    """Collect every folder under `directory` that holds a 'page.txt' file."""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                # Technical folders are never pages, so don't descend into them
+                if entry.name not in _NON_PAGE_DIRS:
+                    _scan_page_folders(entry.path, found)
+            elif entry.name == "page.txt" and entry.is_file():
+                found.append(directory)
+
 
 def _iter_page_folders() -> List[Path]:
     """
@@ -29,16 +93,9 @@ def _iter_page_folders() -> List[Path]:
     if not CONTENT_ROOT.exists():
         return []
 
-    page_dirs: List[Path] = []
-    # Find all 'page.txt' files anywhere under CONTENT_ROOT and treat their
-    # parent directories as page folders.
-    for page_file in CONTENT_ROOT.rglob("page.txt"):
-        parent = page_file.parent
-        # Skip technical folders we don't want to expose as pages
-        if parent.name in {"boards", "pages", "boards_old"}:
-            continue
-        page_dirs.append(parent)
-    return page_dirs
+    found: List[str] = []
+    _scan_page_folders(str(CONTENT_ROOT), found)
+    return [Path(page_dir) for page_dir in found]
 
 
 def list_pages() -> List[str]:
@@ -55,35 +112,69 @@ def list_pages() -> List[str]:
     return pages
 
 
-def page_has_valid_boards(page_path: str) -> bool:
-    """Check if a page references only existing board files."""
-    import re
+def _board_names(boards_dir: Path) -> Set[str]:
+    """Names of the entries in a page's boards folder (one scandir call)."""
     try:
-        page_file = CONTENT_ROOT / page_path / "page.txt"
-        if not page_file.exists():
-            return False
-        
-        content = page_file.read_text(encoding="utf-8")
-        board_pattern = re.compile(
-            r"\[\[\s*(BOARD|BOARDS)\s*:\s*([^\]]+?)\s*\]\]",
-            flags=re.IGNORECASE,
-        )
-        
-        for match in board_pattern.finditer(content):
+        with os.scandir(boards_dir) as entries:
+            return {entry.name for entry in entries}
+    except OSError:
+        return set()
+
+
+@lru_cache(maxsize=1024)
+def _page_valid_cached(
+    page_dir: str, page_mtime_ns: int, boards_mtime_ns: Optional[int]
+) -> bool:
+    """
+    Validate one revision of a page. The mtimes are only part of the cache
+    key, so an edit to page.txt or to its boards folder triggers a re-check.
+    """
+    try:
+        content = Path(page_dir, "page.txt").read_text(encoding="utf-8")
+        if "[[" not in content:
+            # No board tag possible, skip the regex scan
+            return True
+        boards_dir = Path(page_dir, "boards")
+        existing: Optional[Set[str]] = None
+
+        for match in _BOARD_RE.finditer(content):
             payload = match.group(2)
             filenames = [p.strip() for p in payload.split(",") if p.strip()]
+            if not filenames:
+                continue
+            if boards_mtime_ns is None:
+                # No boards folder, so no referenced board can exist
+                return False
+            if existing is None:
+                existing = _board_names(boards_dir)
             for filename in filenames:
-                board_path = CONTENT_ROOT / page_path / "boards" / filename
-                if not board_path.exists():
+                # Names with sub-paths (or a case-insensitive filesystem)
+                # won't be in the listing, so confirm a miss on disk
+                if filename not in existing and not (boards_dir / filename).exists():
                     return False
         return True
     except Exception:
         return False
 
 
-def build_sidebar_tree() -> List[Dict[str, Any]]:
+def page_has_valid_boards(page_path: str) -> bool:
+    """Check if a page references only existing board files."""
+    page_dir = CONTENT_ROOT / page_path
+    try:
+        page_mtime_ns = os.stat(page_dir / "page.txt").st_mtime_ns
+    except OSError:
+        return False
+    try:
+        boards_mtime_ns: Optional[int] = os.stat(page_dir / "boards").st_mtime_ns
+    except OSError:
+        boards_mtime_ns = None
+    return _page_valid_cached(str(page_dir), page_mtime_ns, boards_mtime_ns)
+
+
+def build_sidebar_tree(valid_pages: List[str]) -> List[Dict[str, Any]]:
     """
-    Build a simple directory tree for the sidebar.
+    Build a simple directory tree for the sidebar from the given page paths
+    (already filtered to pages with valid board references).
 
     Structure:
     [
@@ -98,13 +189,9 @@ def build_sidebar_tree() -> List[Dict[str, Any]]:
       ...
     ]
     """
-    pages = list_pages()
     # Build hierarchical tree: top-level dirs, optional second-level dirs, then pages
     tree: Dict[str, Dict[str, Any]] = {}
-    for page_path in pages:
-        # Skip pages that reference non-existent board files
-        if not page_has_valid_boards(page_path):
-            continue
+    for page_path in valid_pages:
         parts = page_path.split("/")
         if len(parts) == 1:
             top_key = "root"
@@ -126,6 +213,7 @@ def build_sidebar_tree() -> List[Dict[str, Any]]:
                 "name": pretty_top,
                 "key": top_key,
                 "children": [],
+                "_subdirs": {},  # subdir key -> node, dropped before returning
             }
 
         top_node = tree[top_key]
@@ -133,11 +221,7 @@ def build_sidebar_tree() -> List[Dict[str, Any]]:
 
         if subdir:
             # Find or create subdirectory node
-            sub_node = None
-            for child in top_node["children"]:
-                if child.get("type") == "dir" and child.get("key") == subdir:
-                    sub_node = child
-                    break
+            sub_node = top_node["_subdirs"].get(subdir)
             if sub_node is None:
                 sub_node = {
                     "type": "dir",
@@ -145,13 +229,14 @@ def build_sidebar_tree() -> List[Dict[str, Any]]:
                     "key": subdir,
                     "children": [],
                 }
+                top_node["_subdirs"][subdir] = sub_node
                 top_node["children"].append(sub_node)
             sub_node["children"].append(
-                {"type": "page", "name": pretty_name, "path": page_path}
+                {"type": "page", "name": pretty_name, "path": page_path, "_key": name}
             )
         else:
             top_node["children"].append(
-                {"type": "page", "name": pretty_name, "path": page_path}
+                {"type": "page", "name": pretty_name, "path": page_path, "_key": name}
             )
 
     # Define desired page order for each directory (using directory/page names as they appear in filesystem)
@@ -172,11 +257,11 @@ def build_sidebar_tree() -> List[Dict[str, Any]]:
         ],
     }
     
-    # Helper function to extract page key from path
-    def get_page_key_from_path(path: str) -> str:
-        """Extract the page directory name from a page path."""
-        parts = path.split("/")
-        return parts[-1] if parts else ""
+    # Position of each page key (directory name) in its directory's order
+    page_order_index: Dict[str, Dict[str, int]] = {
+        parent_key: {name: i for i, name in enumerate(order_list)}
+        for parent_key, order_list in page_order_map.items()
+    }
     
     # Sort children inside each directory (dirs first, then pages in desired order)
     def sort_children(children: List[Dict[str, Any]], parent_key: str = "") -> None:
@@ -189,25 +274,21 @@ def build_sidebar_tree() -> List[Dict[str, Any]]:
         pages = [c for c in children if c.get("type") == "page"]
         
         # Sort pages according to desired order
-        if parent_key in page_order_map:
-            order_list = page_order_map[parent_key]
-            # Create a map from page key (directory name) to page dict
-            page_map = {}
+        if parent_key in page_order_index:
+            order_index = page_order_index[parent_key]
+            # One slot per desired name (matching by directory name); a later
+            # page with the same key takes the slot
+            slots: List[Optional[Dict[str, Any]]] = [None] * len(order_index)
+            remaining = []
             for p in pages:
-                page_key = get_page_key_from_path(p.get("path", ""))
-                page_map[page_key] = p
-            
-            ordered_pages = []
-            seen_keys = set()
-            
-            # Add pages in desired order (matching by directory name)
-            for order_name in order_list:
-                if order_name in page_map:
-                    ordered_pages.append(page_map[order_name])
-                    seen_keys.add(order_name)
+                position = order_index.get(p["_key"])
+                if position is None:
+                    remaining.append(p)
+                else:
+                    slots[position] = p
+            ordered_pages = [p for p in slots if p is not None]
             
             # Add any remaining pages not in the order list (alphabetically)
-            remaining = [p for p in pages if get_page_key_from_path(p.get("path", "")) not in seen_keys]
             remaining.sort(key=lambda p: p["name"].lower())
             ordered_pages.extend(remaining)
             
@@ -222,6 +303,7 @@ def build_sidebar_tree() -> List[Dict[str, Any]]:
             )
 
     for node in tree.values():
+        del node["_subdirs"]
         sort_children(node["children"], node.get("key", ""))
 
     # Produce an ordered list according to user's desired order
@@ -254,19 +336,96 @@ def build_sidebar_tree() -> List[Dict[str, Any]]:
     return ordered
 
 
-def base_context(**extra: Any) -> Dict[str, Any]:
-    """Common template context."""
-    # Only expose pages that have valid board references
-    valid_pages = [p for p in list_pages() if page_has_valid_boards(p)]
+def _content_signature() -> int:
+    """
+    Cheap fingerprint of the content tree: the xor of (path, mtime_ns) over
+    every file and folder under CONTENT_ROOT, so editing, adding or removing
+    anything changes it. Entries are digested with hashlib rather than hash()
+    so every worker process computes the same value (it feeds the ETags).
+    """
+    if not CONTENT_ROOT.exists():
+        return 0
+    signature = 0
+    pending = [str(CONTENT_ROOT)]
+    while pending:
+        try:
+            entries = os.scandir(pending.pop())
+        except FileNotFoundError:
+            continue  # folder removed since its parent was listed
+        with entries:
+            for entry in entries:
+                try:
+                    mtime_ns = entry.stat(follow_symlinks=False).st_mtime_ns
+                except FileNotFoundError:
+                    # e.g. an editor's temp file, removed since the listing
+                    continue
+                token = f"{entry.path}\0{mtime_ns}".encode("utf-8", "surrogateescape")
+                digest = hashlib.blake2b(token, digest_size=8).digest()
+                signature ^= int.from_bytes(digest, "little")
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+    return signature
+
+
+def _sidebar_data(signature: Optional[int] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Return (sidebar_tree, valid_pages), rebuilt only when content changes."""
+    if signature is None:
+        signature = _content_signature()
+    if _sidebar_cache["mtime"] != signature:
+        # Only expose pages that have valid board references
+        valid_pages = [p for p in list_pages() if page_has_valid_boards(p)]
+        _sidebar_cache["tree"] = build_sidebar_tree(valid_pages)
+        _sidebar_cache["pages"] = valid_pages
+        _sidebar_cache["mtime"] = signature
+    return _sidebar_cache["tree"], _sidebar_cache["pages"]
+
+
+def base_context(signature: Optional[int] = None, **extra: Any) -> Dict[str, Any]:
+    """Common template context (pass `signature` if already computed)."""
+    sidebar_tree, valid_pages = _sidebar_data(signature)
     ctx: Dict[str, Any] = {
         "year": datetime.now().year,
-        "sidebar_tree": build_sidebar_tree(),
+        "sidebar_tree": sidebar_tree,
         "all_pages": valid_pages,
     }
     ctx.update(extra)
     return ctx
 
 
+def _code_signature() -> str:
+    """mtime_ns of main.py and of every template, which shape each view's markup."""
+    paths = [Path(__file__)] + sorted(TEMPLATES_DIR.rglob("*"))
+    tokens: List[str] = []
+    for path in paths:
+        try:
+            tokens.append(f"{path}:{path.stat().st_mtime_ns}")
+        except FileNotFoundError:
+            continue
+    return "\0".join(tokens)
+
+
+def etag_for(signature: int, page_path: Optional[str], editor_mode: bool = False) -> str:
+    """
+    ETag of an HTML view. Every view embeds the sidebar, so it covers the
+    whole content tree (`signature`), plus the templates and code, the
+    footer year, and which view of which page it is.
+    """
+    key = f"{signature}|{_code_signature()}|{datetime.now().year}|{page_path!r}|{editor_mode}"
+    return f'"{hashlib.blake2b(key.encode("utf-8", "surrogateescape"), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the client's If-None-Match already names this ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate in (etag, f"W/{etag}", "*"):
+            return True
+    return False
+
+
 def read_page_source(page_path: str) -> str:
     """Load raw text for a page from its folder."""
     page_dir = CONTENT_ROOT / page_path
@@ -276,9 +435,48 @@ def read_page_source(page_path: str) -> str:
     return page_file.read_text(encoding="utf-8")
 
 
-def read_board(page_path: str, board_filename: str) -> Dict[str, Any]:
+def _boards_signature(boards_dir: Path) -> int:
+    """Xor of (name, mtime_ns) over a boards folder (one scandir call)."""
+    signature = 0
+    try:
+        with os.scandir(boards_dir) as entries:
+            for entry in entries:
+                signature ^= hash((entry.name, entry.stat().st_mtime_ns))
+    except OSError:
+        pass
+    return signature
+
+
+@lru_cache(maxsize=256)
+def _read_boards_cached(boards_dir: str, boards_signature: int) -> Dict[str, bytes]:
     """
-    Read a board text file for a given page.
+    Read every file of one revision of a boards folder. The signature is only
+    part of the cache key, so saving a board reads the folder afresh.
+    """
+    boards: Dict[str, bytes] = {}
+    try:
+        with os.scandir(boards_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    with open(entry.path, "rb") as f:
+                        boards[entry.name] = f.read()
+    except OSError:
+        pass
+    return boards
+
+
+def _load_boards_for_page(page_path: str) -> Dict[str, bytes]:
+    """Map each file in a page's boards folder to its raw content."""
+    boards_dir = CONTENT_ROOT / page_path / "boards"
+    return _read_boards_cached(str(boards_dir), _boards_signature(boards_dir))
+
+
+def read_board(
+    page_path: str, board_filename: str, boards: Optional[Dict[str, bytes]] = None
+) -> Dict[str, Any]:
+    """
+    Read a board text file for a given page. `boards` is the page's
+    _load_boards_for_page() result, loaded here when not passed in.
 
     Supports optional metadata header at the top:
       # PIECES: i, o, t
@@ -289,44 +487,65 @@ def read_board(page_path: str, board_filename: str) -> Dict[str, Any]:
         "pieces": ["i", "o", "t"] or None,
       }
     """
-    board_path = CONTENT_ROOT / page_path / "boards" / board_filename
-    if not board_path.exists():
-        raise HTTPException(
-            status_code=404,
-            detail=f"Board file not found: {page_path}/boards/{board_filename}",
-        )
-
-    raw_lines = board_path.read_text(encoding="utf-8").splitlines()
+    if boards is None:
+        boards = _load_boards_for_page(page_path)
+    data = boards.get(board_filename)
+    if data is None:
+        # Not a plain file name from the listing (e.g. a sub-path), look it up
+        board_path = CONTENT_ROOT / page_path / "boards" / board_filename
+        if not board_path.exists():
+            raise HTTPException(
+                status_code=404,
+                detail=f"Board file not found: {page_path}/boards/{board_filename}",
+            )
+        data = board_path.read_bytes()
+
+    raw_lines = data.decode("utf-8").splitlines()
     pieces: List[str] | None = None
     rows: List[str] = []
-    in_grid = False
 
-    for line in raw_lines:
+    for index, line in enumerate(raw_lines):
         stripped = line.strip()
-        if not in_grid:
-            if not stripped:
-                # skip empty lines before grid
-                continue
-            if stripped.startswith("#"):
-                # metadata line
-                meta = stripped.lstrip("#").strip()
-                if meta.upper().startswith("PIECES:"):
-                    payload = meta[len("PIECES:") :].strip()
-                    if payload:
-                        pieces = [p.strip().lower() for p in payload.split(",") if p.strip()]
-                continue
-            # first non-empty, non-metadata line starts the grid
-            in_grid = True
-            rows.append(line)
-        else:
-            rows.append(line)
+        if not stripped:
+            # skip empty lines before grid
+            continue
+        if stripped.startswith("#"):
+            # metadata line
+            meta = stripped.lstrip("#").strip()
+            if meta.upper().startswith("PIECES:"):
+                payload = meta[len("PIECES:") :].strip()
+                if payload:
+                    pieces = [p.strip().lower() for p in payload.split(",") if p.strip()]
+            continue
+        # first non-empty, non-metadata line starts the grid, which runs
+        # to the end of the file
+        rows = raw_lines[index:]
+        break
 
     return {"rows": rows, "pieces": pieces}
 
 
-def render_board_html(page_path: str, board_filename: str, editor_mode: bool = False) -> str:
+def _editor_header(board_id: str) -> str:
+    """Dropdown menu shown above a board in the editor."""
+    return (
+        '<div class="tetris-board-header">'
+        '<div class="board-dropdown">'
+        '<button class="board-dropdown-toggle" type="button" aria-label="Board options">'
+        '<span class="board-dropdown-icon">⋯</span>'
+        '</button>'
+        '<div class="board-dropdown-menu" style="display: none;">'
+        f'<button class="board-dropdown-item" data-action="edit" data-board-id="{board_id}">Edit Board</button>'
+        '</div>'
+        '</div>'
+        '</div>'
+    )
+
+
+def render_board_html_fast(
+    page_path: str, board_filename: str, boards: Optional[Dict[str, bytes]] = None
+) -> str:
     """Convert a board text file into HTML for a single board."""
-    board = read_board(page_path, board_filename)
+    board = read_board(page_path, board_filename, boards)
     rows = board["rows"]
     
     # Ensure board is exactly 20 rows high (pad with empty rows if needed)
@@ -349,38 +568,37 @@ def render_board_html(page_path: str, board_filename: str, editor_mode: bool = F
         grid_attr = f' data-grid="{"|".join(safe_rows)}"'
 
     html_parts: List[str] = []
-    
-    # Add dropdown menu if in editor mode
-    if editor_mode:
-        html_parts.append('<div class="tetris-board-header">')
-        html_parts.append('<div class="board-dropdown">')
-        html_parts.append('<button class="board-dropdown-toggle" type="button" aria-label="Board options">')
-        html_parts.append('<span class="board-dropdown-icon">⋯</span>')
-        html_parts.append('</button>')
-        html_parts.append('<div class="board-dropdown-menu" style="display: none;">')
-        html_parts.append(f'<button class="board-dropdown-item" data-action="edit" data-board-id="{board_id}">Edit Board</button>')
-        html_parts.append('</div>')
-        html_parts.append('</div>')
-        html_parts.append('</div>')
-    
     html_parts.append(f'<div class="tetris-board" data-board-id="{board_id}"{pieces_attr}{grid_attr}>')
     for row in rows:
-        html_parts.append('<div class="tetris-row">')
         # Ensure row is exactly 10 characters wide
         row_padded = row.ljust(10)[:10]
-        for ch in row_padded:
-            cell_class = "cell-empty"
-            ch_lower = ch.lower()
-            if ch_lower in {"i", "o", "t", "s", "z", "j", "l"}:
-                cell_class = f"cell-{ch_lower}"
-            html_parts.append(f'<div class="tetris-cell {cell_class}" data-piece="{ch_lower if ch_lower in {"i", "o", "t", "s", "z", "j", "l"} else ""}"></div>')
-        html_parts.append("</div>")  # end tetris-row
+        cells = "".join(_CELL_HTML.get(ch, _EMPTY_CELL) for ch in row_padded)
+        html_parts.append(f'<div class="tetris-row">{cells}</div>')
     html_parts.append("</div>")  # end tetris-board
     return "".join(html_parts)
 
 
-def render_boards_row_html(page_path: str, board_filenames: List[str], editor_mode: bool = False) -> str:
+def render_board_html_editor(
+    page_path: str, board_filename: str, boards: Optional[Dict[str, bytes]] = None
+) -> str:
+    """Like render_board_html_fast, with the editor's dropdown menu on top."""
+    board_html = render_board_html_fast(page_path, board_filename, boards)
+    return _editor_header(f'{page_path}/boards/{board_filename}') + board_html
+
+
+# render_board_html_fast or render_board_html_editor
+BoardRenderer = Callable[[str, str, Optional[Dict[str, bytes]]], str]
+
+
+def render_boards_row_html(
+    page_path: str,
+    board_filenames: List[str],
+    render_board: BoardRenderer = render_board_html_fast,
+    boards: Optional[Dict[str, bytes]] = None,
+) -> str:
     """Render up to three boards as one horizontal row."""
+    if boards is None:
+        boards = _load_boards_for_page(page_path)
     limited = board_filenames[:3]
     parts: List[str] = ['<div class="tetris-board-row">']
     for filename in limited:
@@ -388,27 +606,26 @@ def render_boards_row_html(page_path: str, board_filenames: List[str], editor_mo
         stem = Path(filename).stem
         caption = stem.replace("_", " ").title()
         parts.append('<figure class="tetris-board-wrapper">')
-        parts.append(render_board_html(page_path, filename, editor_mode=editor_mode))
+        parts.append(render_board(page_path, filename, boards))
         parts.append(f'<div class="tetris-board-caption">{caption}</div>')
         parts.append("</figure>")
     parts.append("</div>")
     return "".join(parts)
 
 
-def extract_headings(html: str) -> List[Dict[str, Any]]:
-    """Extract h1, h2, h3 headings from HTML and return list with level, text, and id."""
-    import re
-    
+def process_headings(html: str) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Extract h1, h2, h3 headings from HTML (list with level, text, and id)
+    and add the ID attributes to their divs, in a single pass.
+    """
     headings: List[Dict[str, Any]] = []
-    # Match h1, h2, h3 tags
-    pattern = re.compile(r'<div class="(h1|h2|h3)">(.*?)</div>', re.IGNORECASE)
     
-    for match in pattern.finditer(html):
+    def repl(match: re.Match) -> str:
         level_tag = match.group(1).lower()
         text = match.group(2).strip()
         # Create ID from text (lowercase, replace spaces with hyphens, remove special chars)
-        heading_id = re.sub(r'[^a-z0-9\s-]', '', text.lower())
-        heading_id = re.sub(r'\s+', '-', heading_id)
+        heading_id = _HEADING_ID_STRIP.sub('', text.lower())
+        heading_id = _HEADING_ID_SPACE.sub('-', heading_id)
         heading_id = heading_id.strip('-')
         
         level = int(level_tag[1])  # Extract number from h1, h2, h3
@@ -417,22 +634,15 @@ def extract_headings(html: str) -> List[Dict[str, Any]]:
             "text": text,
             "id": heading_id
         })
+        
+        # Only the canonical form gets an ID (lowercase class, no padding
+        # around the text); other spellings are listed but left untouched
+        plain = f'<div class="h{level}">{text}</div>'
+        if match.group(0) != plain:
+            return match.group(0)
+        return f'<div class="h{level}" id="{heading_id}">{text}</div>'
     
-    return headings
-
-
-def add_heading_ids(html: str, headings: List[Dict[str, Any]]) -> str:
-    """Add ID attributes to heading divs in HTML."""
-    import re
-    
-    result = html
-    for heading in headings:
-        # Replace the heading div with one that has an ID
-        pattern = rf'<div class="h{heading["level"]}">({re.escape(heading["text"])})</div>'
-        replacement = f'<div class="h{heading["level"]}" id="{heading["id"]}">{heading["text"]}</div>'
-        result = re.sub(pattern, replacement, result, count=1)
-    
-    return result
+    return _HEADING_RE.sub(repl, html), headings
 
 
 def build_breadcrumb(page_path: str) -> List[Dict[str, str]]:
@@ -455,8 +665,6 @@ def build_breadcrumb(page_path: str) -> List[Dict[str, str]]:
 
 def inject_breadcrumb_into_title(html: str, breadcrumb: List[Dict[str, str]]) -> str:
     """Inject breadcrumb into article-title div."""
-    import re
-    
     if not breadcrumb:
         return html
     
@@ -469,118 +677,75 @@ def inject_breadcrumb_into_title(html: str, breadcrumb: List[Dict[str, str]]) ->
     breadcrumb_html = '<div class="breadcrumb">' + ''.join(breadcrumb_parts) + '</div>'
     
     # Find article-title div and inject breadcrumb before the title text
-    pattern = r'(<div class="article-title">)(.*?)(</div>)'
     def repl(match):
         return match.group(1) + breadcrumb_html + match.group(2) + match.group(3)
     
-    return re.sub(pattern, repl, html, count=1)
+    return _ARTICLE_TITLE.sub(repl, html, count=1)
+
+
+def _inline_repl(match: re.Match) -> str:
+    """Wrap one bold/italic span, formatting markup nested inside it too."""
+    kind = match.lastgroup
+    inner = match.re.sub(_inline_repl, match.group(kind))
+    tag = "em" if kind == "em" else "strong"
+    return f"<{tag}>{inner}</{tag}>"
 
 
-def convert_markdown_formatting(content: str) -> str:
+def format_inline(line: str) -> str:
     """
-    Convert markdown-style formatting to HTML.
+    Convert markdown-style formatting on a single line to HTML.
     Supports:
     - **text** or *text* for bold
     - _text_ for italic
     """
-    import re
-    
-    # Convert bold: **text** (double asterisk) first
-    content = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', content)
-    
-    # Convert bold: *text* (single asterisk)
-    # Process line by line to avoid matching list markers
-    lines = content.split('\n')
-    result_lines = []
-    for line in lines:
-        # Check if line starts with list marker (bullet or numbered list)
-        if re.match(r'^\s*([-*]|\d+\.)\s', line):
-            # It's a list item, don't process asterisks for bold
-            result_lines.append(line)
-        else:
-            # Not a list item, process *text* for bold
-            # Match *text* but ensure it's not part of **text** (already processed)
-            line = re.sub(r'(?<!\*)\*([^*\n]+?)\*(?!\*)', r'<strong>\1</strong>', line)
-            result_lines.append(line)
-    content = '\n'.join(result_lines)
-    
-    # Convert italic: _text_
-    content = re.sub(r'_([^_\n]+?)_', r'<em>\1</em>', content)
-    
-    return content
+    # A line starting with a list marker (bullet or numbered list) keeps its
+    # asterisks for the marker, so only **text** and _text_ apply there
+    if _LIST_MARKER.match(line):
+        return _INLINE_LIST_RE.sub(_inline_repl, line)
+    return _INLINE_RE.sub(_inline_repl, line)
 
 
-def convert_lists_to_html(content: str) -> str:
+def convert_markdown_to_html(content: str, out: List[str]) -> None:
     """
-    Convert markdown-style lists to HTML lists.
+    Convert markdown-style formatting and lists to HTML in a single pass
+    over the lines, appending the resulting lines to out.
     Supports:
     - Bullet lists: lines starting with '- ' or '* '
     - Numbered lists: lines starting with '1. ', '2. ', etc.
-    """
-    import re
+    - Bold and italic, see format_inline()
     
-    lines = content.split('\n')
-    result_lines: List[str] = []
-    i = 0
+    Every pattern involved stops at line breaks, so formatting each line
+    right before grouping it into a list gives the same result as
+    formatting the whole text first.
+    """
+    open_tag: Optional[str] = None  # 'ul' / 'ol' while a list is being emitted
     
-    while i < len(lines):
-        line = lines[i]
-        stripped = line.strip()
+    for line in content.split('\n'):
+        line = format_inline(line)
         
-        # Check if this line starts a list
-        bullet_match = re.match(r'^(\s*)([-*])\s+(.+)$', line)
-        numbered_match = re.match(r'^(\s*)(\d+)\.\s+(.+)$', line)
+        item = _LIST_BULLET.match(line)
+        list_tag = 'ul' if item else None
+        if item is None:
+            item = _LIST_NUMBERED.match(line)
+            list_tag = 'ol' if item else None
         
-        if bullet_match or numbered_match:
-            # Start collecting list items
-            list_items: List[Tuple[str, str]] = []  # (indent, content)
-            is_numbered = numbered_match is not None
-            
-            # Collect all consecutive list items
-            while i < len(lines):
-                current_line = lines[i]
-                current_stripped = current_line.strip()
-                
-                if not current_stripped:
-                    # Empty line ends the list
-                    break
-                
-                bullet = re.match(r'^(\s*)([-*])\s+(.+)$', current_line)
-                numbered = re.match(r'^(\s*)(\d+)\.\s+(.+)$', current_line)
-                
-                if bullet:
-                    if is_numbered:
-                        break  # Different list type, end current list
-                    indent = bullet.group(1)
-                    content = bullet.group(3)
-                    list_items.append((indent, content))
-                    i += 1
-                elif numbered:
-                    if not is_numbered:
-                        break  # Different list type, end current list
-                    indent = numbered.group(1)
-                    content = numbered.group(3)
-                    list_items.append((indent, content))
-                    i += 1
-                else:
-                    # Not a list item, end the list
-                    break
-            
-            # Convert list items to HTML
-            if list_items:
-                list_tag = 'ol' if is_numbered else 'ul'
-                list_class = 'numbered-list' if is_numbered else 'bullet-list'
-                result_lines.append(f'<{list_tag} class="{list_class}">')
-                for indent, item_content in list_items:
-                    result_lines.append(f'  <li>{item_content}</li>')
-                result_lines.append(f'</{list_tag}>')
+        # An empty line, a plain line or a different list type ends the list
+        if open_tag and list_tag != open_tag:
+            out.append(f'</{open_tag}>')
+            open_tag = None
+        
+        if item is None:
+            out.append(line)
             continue
         
-        # Not a list item, add line as-is
-        result_lines.append(line)
-        i += 1
+        if open_tag is None:
+            list_class = 'numbered-list' if list_tag == 'ol' else 'bullet-list'
+            out.append(f'<{list_tag} class="{list_class}">')
+            open_tag = list_tag
+        out.append(f'  <li>{item.group(3)}</li>')
     
-    return '\n'.join(result_lines)
+    if open_tag:
+        out.append(f'</{open_tag}>')
 
 
 def parse_page_content(page_path: str, raw: str, breadcrumb: List[Dict[str, str]] = None, editor_mode: bool = False) -> Tuple[str, List[Dict[str, str]], List[Dict[str, Any]]]:
@@ -599,31 +764,27 @@ def parse_page_content(page_path: str, raw: str, breadcrumb: List[Dict[str, str]
     
     Returns: (rendered_html, sources, headings)
     """
-    import re
-
     # First, handle lines that are exactly '---' and collect sources.
-    processed_lines: List[str] = []
     sources: List[Dict[str, str]] = []
-
-    for line in raw.splitlines():
-        stripped = line.strip()
-        if stripped == "---":
-            processed_lines.append('<hr class="section-separator">')
-        elif stripped.upper().startswith("SOURCE:"):
-            # SOURCE: Description - https://example.com
-            payload = stripped[len("SOURCE:") :].strip()
-            if " - " in payload:
-                label, url = payload.split(" - ", 1)
-                sources.append({"label": label.strip(), "url": url.strip()})
-            # Do not include this line in the main rendered content
-        else:
-            processed_lines.append(line)
-    joined = "\n".join(processed_lines)
     
-    board_pattern = re.compile(
-        r"\[\[\s*(BOARD|BOARDS)\s*:\s*([^\]]+?)\s*\]\]",
-        flags=re.IGNORECASE,
-    )
+    def rule_or_source(match: re.Match) -> str:
+        if match.group(1):
+            return '<hr class="section-separator">'
+        # SOURCE: Description - https://example.com
+        payload = match.group(2)
+        if " - " in payload:
+            label, url = payload.split(" - ", 1)
+            sources.append({"label": label.strip(), "url": url.strip()})
+        # Do not include this line in the main rendered content
+        return ""
+    
+    # Normalise line endings (e.g. a CRLF checkout) the way splitlines() would
+    joined = _LINE_BREAK_RE.sub("\n", raw)
+    joined = _RULE_OR_SOURCE_RE.sub(rule_or_source, joined)
+    if joined.endswith("\n"):
+        # Like splitlines(), a final line break does not start another line
+        joined = joined[:-1]
+    
     board_placeholders: List[Tuple[str, List[str]]] = []
     
     def extract_boards(match: re.Match) -> str:
@@ -633,29 +794,30 @@ def parse_page_content(page_path: str, raw: str, breadcrumb: List[Dict[str, str]
         board_placeholders.append((kind, filenames))
         return f"@@BOARDPLACEHOLDER{len(board_placeholders) - 1}@@"
     
-    joined = board_pattern.sub(extract_boards, joined)
+    joined = _BOARD_RE.sub(extract_boards, joined)
     
-    # Convert markdown formatting (bold/italic)
-    joined = convert_markdown_formatting(joined)
-    
-    # Convert lists to HTML
-    joined = convert_lists_to_html(joined)
+    # Convert markdown formatting (bold/italic) and lists to HTML
+    out: List[str] = []
+    convert_markdown_to_html(joined, out)
+    rendered = "\n".join(out)
 
-    def render_placeholder(kind: str, filenames: List[str]) -> str:
+    def render_placeholder(match: re.Match) -> str:
+        kind, filenames = board_placeholders[int(match.group(1))]
         if not filenames:
             return ""
         if kind == "BOARD":
-            return render_boards_row_html(page_path, [filenames[0]], editor_mode=editor_mode)
-        return render_boards_row_html(page_path, filenames, editor_mode=editor_mode)
+            filenames = [filenames[0]]
+        return render_boards_row_html(page_path, filenames, render_board, boards)
 
-    rendered = joined
-    for idx, (kind, filenames) in enumerate(board_placeholders):
-        placeholder = f"@@BOARDPLACEHOLDER{idx}@@"
-        rendered = rendered.replace(placeholder, render_placeholder(kind, filenames))
+    if board_placeholders:
+        # Decide once whether boards get the editor chrome
+        render_board = render_board_html_editor if editor_mode else render_board_html_fast
+        # Every board of the page comes from one read of its boards folder
+        boards = _load_boards_for_page(page_path)
+        rendered = _BOARD_PLACEHOLDER_RE.sub(render_placeholder, rendered)
     
     # Extract headings and add IDs
-    headings = extract_headings(rendered)
-    rendered = add_heading_ids(rendered, headings)
+    rendered, headings = process_headings(rendered)
     
     # Inject breadcrumb into article title if provided
     if breadcrumb:
@@ -664,13 +826,73 @@ def parse_page_content(page_path: str, raw: str, breadcrumb: List[Dict[str, str]
     return rendered, sources, headings
 
 
+# (raw, rendered_html, sources, headings, breadcrumb)
+RenderedPage = Tuple[
+    str, str, List[Dict[str, str]], List[Dict[str, Any]], Optional[List[Dict[str, str]]]
+]
+
+
+def page_signature(page_path: str) -> Tuple[int, int]:
+    """
+    Identify the current revision of a page: the mtime of its page.txt and
+    the signature of its boards folder.
+    """
+    page_dir = CONTENT_ROOT / page_path
+    try:
+        page_mtime_ns = os.stat(page_dir / "page.txt").st_mtime_ns
+    except OSError:
+        raise HTTPException(status_code=404, detail="Page not found")
+    return page_mtime_ns, _boards_signature(page_dir / "boards")
+
+
+@lru_cache(maxsize=256)
+def _render_page_cached(
+    page_path: str, page_mtime_ns: int, boards_signature: int, editor_mode: bool
+) -> RenderedPage:
+    """
+    Read and render one revision of a page. The signature arguments only act
+    as cache keys, so an edit to page.txt or a board renders afresh.
+
+    Returns: (raw, rendered_html, sources, headings, breadcrumb)
+    """
+    raw = read_page_source(page_path)
+    breadcrumb = None if editor_mode else build_breadcrumb(page_path)
+    rendered_html, sources, headings = parse_page_content(
+        page_path, raw, breadcrumb, editor_mode=editor_mode
+    )
+    return raw, rendered_html, sources, headings, breadcrumb
+
+
+def render_page(
+    page_path: str, editor_mode: bool = False, revision: Optional[Tuple[int, int]] = None
+) -> RenderedPage:
+    """
+    Rendered page for the current revision on disk, cached per revision.
+    Pass `revision` if page_signature() was already called for this request.
+    """
+    if revision is None:
+        revision = page_signature(page_path)
+    return _render_page_cached(page_path, *revision, editor_mode)
+
+
 @app.get("/editor/{page_path:path}", response_class=HTMLResponse)
 async def editor_page(page_path: str, request: Request):
-    raw = read_page_source(page_path)
-    rendered_html, sources, headings = parse_page_content(page_path, raw, editor_mode=True)
+    # Resolve the page first, so a missing one is a 404 whatever the client
+    # sends in If-None-Match (a "*" there only matches an existing page)
+    revision = page_signature(page_path)
+    signature = _content_signature()
+    headers = {
+        "ETag": etag_for(signature, page_path, editor_mode=True),
+        "Cache-Control": _EDITOR_CACHE_CONTROL,
+    }
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    raw, rendered_html, sources, headings, _ = render_page(page_path, editor_mode=True, revision=revision)
     return templates.TemplateResponse(
         "editor.html",
         base_context(
+            signature,
             request=request,
             page_path=page_path,
             raw_content=raw,
@@ -678,6 +900,7 @@ async def editor_page(page_path: str, request: Request):
             sources=sources,
             show_nav_links=True,
         ),
+        headers=headers,
     )
 
 
@@ -742,26 +965,40 @@ async def save_page(request: PageSaveRequest):
 
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
+    signature = _content_signature()
+    headers = {"ETag": etag_for(signature, None), "Cache-Control": _PAGE_CACHE_CONTROL}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
     pages = list_pages()
     return templates.TemplateResponse(
         "index.html",
         base_context(
+            signature,
             request=request,
             pages=pages,
             page_path=None,
             show_nav_links=True,
         ),
+        headers=headers,
     )
 
 
 @app.get("/{page_path:path}", response_class=HTMLResponse)
 async def view_page(page_path: str, request: Request):
-    raw = read_page_source(page_path)
-    breadcrumb = build_breadcrumb(page_path)
-    rendered_html, sources, headings = parse_page_content(page_path, raw, breadcrumb)
+    # Resolve the page first, so a missing one is a 404 whatever the client
+    # sends in If-None-Match (a "*" there only matches an existing page)
+    revision = page_signature(page_path)
+    signature = _content_signature()
+    headers = {"ETag": etag_for(signature, page_path), "Cache-Control": _PAGE_CACHE_CONTROL}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    _, rendered_html, sources, headings, breadcrumb = render_page(page_path, revision=revision)
     return templates.TemplateResponse(
         "page.html",
         base_context(
+            signature,
             request=request,
             page_path=page_path,
             rendered_content=rendered_html,
@@ -770,4 +1007,5 @@ async def view_page(page_path: str, request: Request):
             breadcrumb=breadcrumb,
             show_nav_links=False,  # reading view: minimal navbar
         ),
+        headers=headers,
     )
@@ -1,6 +1,11 @@
 from PIL import Image
 import math
 
+try:
+    import numpy as np
+except ImportError:  # fall back to the per-pixel loop
+    np = None
+
 # --- Standard Guideline Tetromino Colors ---
 TETROMINO_COLORS = {
     "i": (0, 255, 255),
@@ -12,24 +17,48 @@ TETROMINO_COLORS = {
     "l": (255, 165, 0),
 }
 
+# Pre-unpacked (key, r, g, b) entries for the per-pixel loop
+_PALETTE = tuple((k, r, g, b) for k, (r, g, b) in TETROMINO_COLORS.items())
+
+# Squared distance above which a pixel counts as "empty" (tweak if needed)
+_EMPTY_THRESHOLD = 60_000
+
 def nearest_tetromino_color(pixel):
     r, g, b = pixel[:3]
     best_key = "_"
-    best_dist = float("inf")
+    best_dist = 1 << 30  # int start keeps every comparison int-to-int
 
-    for key, (cr, cg, cb) in TETROMINO_COLORS.items():
+    palette = _PALETTE  # local lookup in the hot loop
+    for key, cr, cg, cb in palette:
         dist = (r - cr)**2 + (g - cg)**2 + (b - cb)**2
         if dist < best_dist:
             best_key = key
             best_dist = dist
 
     # If the pixel looks "empty"
-    if best_dist > 60_000:  # tweak threshold if needed
+    if best_dist > _EMPTY_THRESHOLD:
         return "_"
 
     return best_key
 
 
+def classify_rows_numpy(img):
+    """Classify every pixel at once: distance to all 7 colors, then argmin."""
+    keys = np.array(list(TETROMINO_COLORS) + ["_"])
+    # int32: squared channel differences (up to 255**2) overflow int16
+    palette = np.array(list(TETROMINO_COLORS.values()), dtype=np.int32)
+    pixels = np.asarray(img, dtype=np.int32)  # (height, width, 3)
+
+    diff = pixels[:, :, None, :] - palette[None, None, :, :]
+    dist = (diff * diff).sum(axis=-1)  # (height, width, 7)
+    best = dist.argmin(axis=-1)
+
+    # If the pixel looks "empty", point it at the trailing "_" key
+    best[dist.min(axis=-1) > _EMPTY_THRESHOLD] = len(palette)
+
+    return ["".join(row) for row in keys[best]]
+
+
 def png_to_tetris_txt(png_path, txt_path, board_width, board_height):
     # Load image
     img = Image.open(png_path).convert("RGB")
@@ -38,13 +67,19 @@ def png_to_tetris_txt(png_path, txt_path, board_width, board_height):
     img = img.resize((board_width, board_height), Image.NEAREST)
 
     # Construct rows top → bottom
-    lines = []
-    for y in range(board_height):
-        row_chars = ""
-        for x in range(board_width):
-            pixel = img.getpixel((x, y))
-            row_chars += nearest_tetromino_color(pixel)
-        lines.append(row_chars)
+    if np is not None:
+        lines = classify_rows_numpy(img)
+    else:
+        # Pull all pixel data in one call instead of one getpixel() per pixel
+        raw = img.tobytes()  # RGB, 3 bytes per pixel, row by row
+        row_size = board_width * 3
+        lines = []
+        for start in range(0, board_height * row_size, row_size):
+            row_chars = ""
+            for i in range(start, start + row_size, 3):
+                pixel = (raw[i], raw[i + 1], raw[i + 2])
+                row_chars += nearest_tetromino_color(pixel)
+            lines.append(row_chars)
 
     # Write out the text file
     with open(txt_path, "w", encoding="utf-8") as f: